@@ -0,0 +1,265 @@
+"""Extract the lazy-chunk graph, storage keys and Statsig call sites from JS bundles.
+
+Bundles are taken from HAR responses (`.js` URLs / JavaScript MIME types) or
+from `.js` files on disk.  Each body is scanned once with a single combined
+regex pass that records:
+
+  - the `__vite__mapDeps` preload table and every `import("…")` /
+    `import … from "…"` edge, giving a chunk dependency graph,
+  - `localStorage` / `sessionStorage` keys passed to `get/set/removeItem`,
+  - `oai/apps/*` identifiers anywhere in string literals,
+  - Statsig call sites `Wt(…"id"…)` / `We(…"id"…)` with their character offset.
+
+Results are cached per bundle in `--cache`, keyed by the CDN asset name for
+immutable `assets/{hash}.js` URLs (so cached HAR bodies are not even
+decoded) and by the SHA-256 of the body otherwise.  When bundle hashes rotate
+only new chunks are scanned; `--prune` drops cache entries for bundles that
+were not seen in the current run, so retired deployments do not accumulate.
+
+Usage:
+
+    python tools/bundle_scanner.py --paths hars --output bundles.json
+
+Output: `{"graph": {chunk: [deps…]}, "storage_keys": [...], "app_ids": [...],
+"statsig_calls": {chunk: [{"callee", "id", "offset"}, …]}}`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_PATHS = [Path("hars")]
+DEFAULT_CACHE = Path("bundle_cache.json")
+CACHE_VERSION = 1
+
+JS_MIME_MARKERS = ("javascript", "ecmascript")
+ASSET_URL = re.compile(r"/assets/([\w.-]+\.m?js)(?:\?|$)")
+
+SCAN_PATTERN = re.compile(
+    r"""
+      (?P<mapdeps>__vite__mapDeps\s*=.{0,200}?m\.f\s*=\s*\[(?P<table>[^\]]*)\])
+    | import\(\s*["'`](?P<dynamic>[^"'`]+\.m?js)["'`]\s*\)
+      (?:\s*,\s*__vite__mapDeps\(\s*\[(?P<deps>[\d,\s]*)\]\s*\))?
+    | (?:\bfrom|\bimport)\s*["'`](?P<static>[^"'`]+\.m?js)["'`]
+    | (?:local|session)Storage\.(?:get|set|remove)Item\(\s*["'`](?P<storage>[^"'`]+)["'`]
+    | ["'`](?P<app>oai/apps/[\w./-]+)["'`]
+    | \b(?P<callee>Wt|We)\((?P<args>[^()]{0,40}?)["'](?P<gate>\d{5,})["']
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+QUOTED = re.compile(r"""["'`]([^"'`]+)["'`]""")
+
+
+def chunk_name(ref: str) -> str:
+    """Normalise `./x.js`, `assets/x.js` and full CDN URLs to the bare file name."""
+    return ref.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+
+
+def scan_bundle(text: str) -> Dict[str, Any]:
+    """Run the combined extraction pass over one bundle body."""
+    table: List[str] = []
+    imports: set = set()
+    lazy: List[Tuple[str, List[int]]] = []
+    storage_keys: set = set()
+    app_ids: set = set()
+    calls: List[Dict[str, Any]] = []
+
+    for match in SCAN_PATTERN.finditer(text):
+        if match.group("mapdeps") is not None:
+            table = [chunk_name(ref) for ref in QUOTED.findall(match.group("table"))]
+        elif match.group("dynamic") is not None:
+            indices = [int(idx) for idx in (match.group("deps") or "").replace(" ", "").split(",") if idx]
+            lazy.append((chunk_name(match.group("dynamic")), indices))
+        elif match.group("static") is not None:
+            imports.add(chunk_name(match.group("static")))
+        elif match.group("storage") is not None:
+            storage_keys.add(match.group("storage"))
+            if match.group("storage").startswith("oai/apps/"):
+                app_ids.add(match.group("storage"))
+        elif match.group("app") is not None:
+            app_ids.add(match.group("app"))
+        elif match.group("gate") is not None:
+            calls.append({"callee": match.group("callee"), "id": match.group("gate"), "offset": match.start()})
+
+    # `import()` may precede the mapDeps table in the source, so resolve indices last.
+    lazy_edges = {
+        chunk: sorted({table[idx] for idx in indices if idx < len(table)} - {chunk})
+        for chunk, indices in lazy
+    }
+    return {
+        "imports": sorted(imports),
+        "lazy": lazy_edges,
+        "storage_keys": sorted(storage_keys),
+        "app_ids": sorted(app_ids),
+        "statsig_calls": calls,
+    }
+
+
+def iter_files(paths: Iterable[Path]) -> Iterable[Path]:
+    for path in paths:
+        if not path.exists():
+            continue
+        if path.is_file():
+            yield path
+            continue
+        for child in sorted(path.rglob("*")):
+            if child.is_file():
+                yield child
+
+
+def _har_bundles(path: Path, cache: Dict[str, Any]) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Yield `(name, cache_key, body_or_None)`; the body is only decoded on a cache miss."""
+    data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
+    for entry in data.get("log", {}).get("entries", []):
+        url = entry.get("request", {}).get("url", "")
+        content = entry.get("response", {}).get("content", {})
+        mime = content.get("mimeType", "")
+        name = chunk_name(url)
+        if not (name.endswith((".js", ".mjs")) or any(marker in mime for marker in JS_MIME_MARKERS)):
+            continue
+        text = content.get("text")
+        if not text:
+            continue
+        asset = ASSET_URL.search(url)
+        if asset and asset.group(1) in cache:
+            yield name, asset.group(1), None
+            continue
+        if content.get("encoding") == "base64":
+            try:
+                text = base64.b64decode(text).decode("utf-8", "ignore")
+            except (ValueError, UnicodeDecodeError):
+                continue
+        key = asset.group(1) if asset else hashlib.sha256(text.encode("utf-8")).hexdigest()
+        yield name, key, text
+
+
+def _file_bundles(path: Path) -> Iterator[Tuple[str, str, Optional[str]]]:
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return
+    yield path.name, hashlib.sha256(raw).hexdigest(), raw.decode("utf-8", "ignore")
+
+
+def load_cache(path: Optional[Path]) -> Dict[str, Any]:
+    if path is None or not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("bundles", {})
+
+
+def save_cache(path: Path, bundles: Dict[str, Any]) -> None:
+    """Write the cache via a temp file so an interrupted run never truncates it."""
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.resolve().parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps({"version": CACHE_VERSION, "bundles": bundles}) + "\n")
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def scan(paths: Iterable[Path], cache: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Set[str], int]:
+    """Return `({chunk_name: extraction}, seen_cache_keys, newly_scanned_count)`, filling `cache` as it goes."""
+    bundles: Dict[str, Dict[str, Any]] = {}
+    seen: Set[str] = set()
+    scanned = 0
+    for file_path in iter_files(paths):
+        suffix = file_path.suffix.lower()
+        if suffix == ".har":
+            sources = _har_bundles(file_path, cache)
+        elif suffix in (".js", ".mjs"):
+            sources = _file_bundles(file_path)
+        else:
+            continue
+        try:
+            for name, key, text in sources:
+                if key not in cache:
+                    if text is None:
+                        continue
+                    cache[key] = scan_bundle(text)
+                    scanned += 1
+                seen.add(key)
+                bundles[name] = cache[key]
+        except json.JSONDecodeError:
+            continue
+    return bundles, seen, scanned
+
+
+def summarise(bundles: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    graph: Dict[str, List[str]] = {}
+    storage_keys: set = set()
+    app_ids: set = set()
+    calls: Dict[str, List[Dict[str, Any]]] = {}
+
+    for name, result in sorted(bundles.items()):
+        deps = set(result["imports"])
+        for chunk, preload in result["lazy"].items():
+            deps.add(chunk)
+            graph.setdefault(chunk, [])
+            graph[chunk] = sorted(set(graph[chunk]) | set(preload))
+        graph[name] = sorted(set(graph.get(name, [])) | deps)
+        storage_keys.update(result["storage_keys"])
+        app_ids.update(result["app_ids"])
+        if result["statsig_calls"]:
+            calls[name] = result["statsig_calls"]
+
+    return {
+        "graph": graph,
+        "storage_keys": sorted(storage_keys),
+        "app_ids": sorted(app_ids),
+        "statsig_calls": calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", nargs="*", type=Path, default=DEFAULT_PATHS, help="HAR files, .js files or directories")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE, help="Per-bundle extraction cache")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the cache")
+    parser.add_argument("--prune", action="store_true", help="Drop cached bundles not seen in this run")
+    parser.add_argument("--output", type=Path, help="Optional output JSON file")
+    args = parser.parse_args()
+
+    cache_path = None if args.no_cache else args.cache
+    cache = load_cache(cache_path)
+    bundles, seen, scanned = scan(args.paths or DEFAULT_PATHS, cache)
+    if not bundles:
+        raise SystemExit("No JavaScript bundles found in provided paths")
+    pruned = 0
+    if args.prune:
+        stale = set(cache) - seen
+        for key in stale:
+            del cache[key]
+        pruned = len(stale)
+    if cache_path is not None and (scanned or pruned):
+        save_cache(cache_path, cache)
+    print(
+        "Scanned %d new bundle(s), %d bundle(s) total, %d pruned from cache" % (scanned, len(bundles), pruned),
+        file=sys.stderr,
+    )
+
+    output_text = json.dumps(summarise(bundles), indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output_text + "\n", encoding="utf-8")
+    else:
+        print(output_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Build and query a hash ↔ string cross-reference graph index.
+
+One pass over the captures (HAR archives or text dumps) plus
+`data/decoded_strings_sources.json` produces an undirected graph whose nodes
+are integer-interned and typed:
+
+  - `hash`   – numeric hashed IDs (Statsig payload names and quoted literals
+    of at least `--min-length` digits),
+  - `key`    – config keys from Statsig `value` dicts and decoded storage keys,
+  - `string` – literal strings (config values, groups, rule IDs, and quoted
+    strings within `CONTEXT_WINDOW` characters of a hash literal),
+  - `file`   – the capture file each observation came from.
+
+Edges carry an observation count.  The index is written as a flat
+little-endian file of CSR adjacency arrays, so `GraphIndex.open` just maps it
+into memory; node labels are sorted per kind and looked up by binary search.
+The header records the `--min-length` the index was built with, so a miss on
+a shorter literal can be told apart from a hash that was never observed.
+
+Usage:
+
+    python tools/hash_graph.py build --paths hars raw --output hash_graph.idx --min-length 8
+    python tools/hash_graph.py neighbors hash_graph.idx 879591222 --kind string
+    python tools/hash_graph.py rank hash_graph.idx --limit 50
+
+`rank` orders hashes by crossref count (total edge weight, i.e. how many
+times the hash was observed next to another node), mirroring
+`research/hash_pointer_overview.md`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if __package__ is None or __package__ == "":
+    # Allow running as a script without packaging the repo as a module.
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+    from tools.statsig_resolver import _iter_har_texts, _process_text  # type: ignore
+else:  # pragma: no cover
+    from .statsig_resolver import _iter_har_texts, _process_text
+
+DEFAULT_PATHS = [Path("raw"), Path("hars")]
+DEFAULT_DECODED = Path("data/decoded_strings_sources.json")
+DEFAULT_INDEX = Path("hash_graph.idx")
+
+KINDS = ("hash", "key", "string", "file")
+HASH, KEY, STRING, FILE = range(len(KINDS))
+
+DEFAULT_MIN_LENGTH = 9
+CONTEXT_WINDOW = 60
+MAX_LITERAL = 200
+STRING_PATTERN = re.compile(r'"(\w[^"\\\n]{1,%d})"' % (MAX_LITERAL - 1))
+
+MAGIC = b"HGIX"
+VERSION = 2
+HEADER = struct.Struct("<4sIIIII%dI" % (len(KINDS) + 1))
+
+
+class GraphBuilder:
+    """Accumulates interned nodes and weighted undirected edges in memory."""
+
+    def __init__(self, min_length: int = DEFAULT_MIN_LENGTH) -> None:
+        self.min_length = min_length
+        self._hash_pattern = re.compile(r'"(\d{%d,})"' % min_length)
+        self.labels: List[Tuple[int, str]] = []
+        self._ids: Dict[Tuple[int, str], int] = {}
+        self.edges: Counter = Counter()
+
+    def node(self, kind: int, label: str) -> int:
+        ident = (kind, label)
+        idx = self._ids.get(ident)
+        if idx is None:
+            idx = self._ids[ident] = len(self.labels)
+            self.labels.append(ident)
+        return idx
+
+    def link(self, a: int, b: int, weight: int = 1) -> None:
+        if a == b:
+            return
+        self.edges[(a, b) if a < b else (b, a)] += weight
+
+    def add_statsig(self, configs: Dict[str, Dict[str, Any]], file_id: int) -> None:
+        for name, data in configs.items():
+            hash_id = self.node(HASH, name)
+            self.link(hash_id, file_id)
+            value = data.get("value")
+            if isinstance(value, dict):
+                for key, val in value.items():
+                    if isinstance(key, str):
+                        self.link(hash_id, self.node(KEY, key))
+                    for literal in _iter_strings(val):
+                        self.link(hash_id, self.node(STRING, literal))
+            for field in ("group", "rule_id"):
+                literal = data.get(field)
+                if isinstance(literal, str) and literal:
+                    self.link(hash_id, self.node(STRING, literal[:MAX_LITERAL]))
+
+    def add_literals(self, text: str, file_id: int) -> None:
+        for match in self._hash_pattern.finditer(text):
+            hash_id = self.node(HASH, match.group(1))
+            self.link(hash_id, file_id)
+            start = max(0, match.start() - CONTEXT_WINDOW)
+            window = text[start:match.end() + CONTEXT_WINDOW]
+            for literal in STRING_PATTERN.findall(window):
+                if not literal.isdigit():
+                    self.link(hash_id, self.node(STRING, literal))
+
+    def add_text(self, text: str, file_id: int) -> None:
+        if "feature_gates" in text:
+            self.add_statsig(_process_text(text), file_id)
+        self.add_literals(text, file_id)
+
+    def add_decoded_sources(self, path: Path) -> None:
+        data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
+        for item in data:
+            key = item.get("key")
+            if not isinstance(key, str):
+                continue
+            key_id = self.node(KEY, key)
+            for occurrence in item.get("occurrences", []):
+                source = occurrence.get("path")
+                if isinstance(source, str):
+                    self.link(key_id, self.node(FILE, source))
+
+    def write(self, path: Path) -> None:
+        """Serialise as CSR arrays with nodes renumbered in (kind, label) order."""
+        encoded = [(kind, label.encode("utf-8")) for kind, label in self.labels]
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        remap = array("I", bytes(4 * len(order)))
+        for new_id, old_id in enumerate(order):
+            remap[old_id] = new_id
+
+        n = len(order)
+        kind_bounds = [0] * (len(KINDS) + 1)
+        for kind, _label in encoded:
+            kind_bounds[kind + 1] += 1
+        for kind in range(len(KINDS)):
+            kind_bounds[kind + 1] += kind_bounds[kind]
+
+        label_offsets = array("I", [0])
+        blob = bytearray()
+        for old_id in order:
+            blob += encoded[old_id][1]
+            label_offsets.append(len(blob))
+
+        degree = [0] * n
+        for a, b in self.edges:
+            degree[remap[a]] += 1
+            degree[remap[b]] += 1
+        indptr = array("I", [0])
+        for count in degree:
+            indptr.append(indptr[-1] + count)
+
+        adjacency: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for (a, b), weight in self.edges.items():
+            adjacency[remap[a]].append((remap[b], weight))
+            adjacency[remap[b]].append((remap[a], weight))
+        indices = array("I")
+        weights = array("I")
+        strength = array("I")
+        for neighbours in adjacency:
+            neighbours.sort()
+            total = 0
+            for other, weight in neighbours:
+                indices.append(other)
+                weights.append(weight)
+                total += weight
+            strength.append(total)
+
+        hash_ids = range(kind_bounds[HASH], kind_bounds[HASH + 1])
+        hash_rank = array("I", sorted(hash_ids, key=lambda idx: (-strength[idx], idx)))
+
+        sections = [label_offsets, indptr, indices, weights, strength, hash_rank]
+        if sys.byteorder != "little":
+            for section in sections:
+                section.byteswap()
+        # Write beside the target and swap it in, so readers never map a partial index.
+        fd, tmp_name = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.resolve().parent)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(HEADER.pack(MAGIC, VERSION, n, len(indices), len(blob), self.min_length, *kind_bounds))
+                for section in sections:
+                    handle.write(section.tobytes())
+                handle.write(bytes(blob))
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+
+def _iter_strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        if value:
+            yield value[:MAX_LITERAL]
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+
+
+def iter_files(paths: Iterable[Path]) -> Iterable[Path]:
+    for path in paths:
+        if not path.exists():
+            continue
+        if path.is_file():
+            yield path
+            continue
+        for child in sorted(path.rglob("*")):
+            if child.is_file():
+                yield child
+
+
+def build(paths: Iterable[Path], decoded: Optional[Path], min_length: int = DEFAULT_MIN_LENGTH) -> GraphBuilder:
+    builder = GraphBuilder(min_length)
+    for file_path in iter_files(paths):
+        file_id = builder.node(FILE, str(file_path))
+        try:
+            if file_path.suffix.lower() == ".har":
+                texts: Iterable[str] = _iter_har_texts(file_path)
+            else:
+                texts = [file_path.read_text(encoding="utf-8", errors="ignore")]
+            for text in texts:
+                builder.add_text(text, file_id)
+        except (OSError, json.JSONDecodeError):
+            continue
+    if decoded is not None and decoded.exists():
+        builder.add_decoded_sources(decoded)
+    return builder
+
+
+class GraphIndex:
+    """Read-only view over a memory-mapped index written by `GraphBuilder.write`."""
+
+    def __init__(self, buffer: Any) -> None:
+        if len(buffer) < HEADER.size:
+            raise ValueError("Hash graph index is truncated (%d bytes)" % len(buffer))
+        magic, version, n, m, blob_len, min_length, *kind_bounds = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a hash graph index (version %d)" % VERSION)
+        if kind_bounds[0] != 0 or kind_bounds[-1] != n or kind_bounds != sorted(kind_bounds):
+            raise ValueError("Hash graph index has inconsistent node kind bounds")
+        self._buffer = buffer
+        self.node_count = n
+        self.edge_count = m
+        self.min_length = min_length
+        self.kind_bounds = kind_bounds
+
+        offset = HEADER.size
+        sizes = [n + 1, n + 1, m, m, n, kind_bounds[HASH + 1] - kind_bounds[HASH]]
+        expected = HEADER.size + 4 * sum(sizes) + blob_len
+        if len(buffer) != expected:
+            raise ValueError("Hash graph index is %d bytes, header expects %d" % (len(buffer), expected))
+        sections = []
+        view = memoryview(buffer)
+        for size in sizes:
+            chunk = view[offset:offset + 4 * size]
+            if sys.byteorder == "little":
+                sections.append(chunk.cast("I"))
+            else:
+                swapped = array("I", chunk.tobytes())
+                swapped.byteswap()
+                sections.append(swapped)
+            offset += 4 * size
+        self.label_offsets, self.indptr, self.indices, self.weights, self.strength, self.hash_rank = sections
+        self._blob = view[offset:offset + blob_len]
+
+    @classmethod
+    def open(cls, path: Path) -> "GraphIndex":
+        with path.open("rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                raise ValueError("Hash graph index %s is empty" % path)
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def label(self, node: int) -> str:
+        return bytes(self._blob[self.label_offsets[node]:self.label_offsets[node + 1]]).decode("utf-8")
+
+    def kind(self, node: int) -> str:
+        for kind in range(len(KINDS)):
+            if node < self.kind_bounds[kind + 1]:
+                return KINDS[kind]
+        raise IndexError(node)
+
+    def find(self, kind: str, label: str) -> Optional[int]:
+        """Binary-search the sorted label range of `kind` for `label`."""
+        target = label.encode("utf-8")
+        kind_idx = KINDS.index(kind)
+        lo, hi = self.kind_bounds[kind_idx], self.kind_bounds[kind_idx + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = bytes(self._blob[self.label_offsets[mid]:self.label_offsets[mid + 1]])
+            if current < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.kind_bounds[kind_idx + 1] and self.label(lo) == label:
+            return lo
+        return None
+
+    def neighbors(self, node: int, kind: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Return `(neighbour, weight)` pairs, optionally restricted to one node kind."""
+        start, end = self.indptr[node], self.indptr[node + 1]
+        if kind is None:
+            return list(zip(self.indices[start:end], self.weights[start:end]))
+        kind_idx = KINDS.index(kind)
+        lo, hi = self.kind_bounds[kind_idx], self.kind_bounds[kind_idx + 1]
+        return [
+            (other, weight)
+            for other, weight in zip(self.indices[start:end], self.weights[start:end])
+            if lo <= other < hi
+        ]
+
+    def crossref_ranking(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = self.hash_rank if limit is None else self.hash_rank[:limit]
+        return [(self.label(node), self.strength[node]) for node in ranked]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="Scan captures and write the index")
+    build_cmd.add_argument("--paths", nargs="*", type=Path, default=DEFAULT_PATHS, help="Files or directories to scan")
+    build_cmd.add_argument("--decoded", type=Path, default=DEFAULT_DECODED, help="decoded_strings_sources.json to include")
+    build_cmd.add_argument("--output", type=Path, default=DEFAULT_INDEX, help="Index file to write")
+    build_cmd.add_argument("--min-length", type=int, default=DEFAULT_MIN_LENGTH, help="Minimum digits for a quoted literal to be indexed as a hash")
+
+    neighbors_cmd = commands.add_parser("neighbors", help="List nodes linked to a hash (or other node)")
+    neighbors_cmd.add_argument("index", type=Path)
+    neighbors_cmd.add_argument("label", help="Node label, e.g. a hash value")
+    neighbors_cmd.add_argument("--of", choices=KINDS, default="hash", help="Kind of the queried node")
+    neighbors_cmd.add_argument("--kind", choices=KINDS, help="Only return neighbours of this kind")
+
+    rank_cmd = commands.add_parser("rank", help="Rank hashes by crossref count")
+    rank_cmd.add_argument("index", type=Path)
+    rank_cmd.add_argument("--limit", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.min_length < 1:
+            parser.error("--min-length must be at least 1")
+        builder = build(args.paths or DEFAULT_PATHS, args.decoded, args.min_length)
+        if not builder.labels:
+            raise SystemExit("Nothing to index in the provided paths")
+        builder.write(args.output)
+        print("Wrote %d nodes, %d edges to %s" % (len(builder.labels), len(builder.edges), args.output))
+        return
+
+    index = GraphIndex.open(args.index)
+    if args.command == "neighbors":
+        node = index.find(args.of, args.label)
+        if node is None:
+            if args.of == "hash" and args.label.isdigit() and len(args.label) < index.min_length:
+                raise SystemExit(
+                    "No hash node %r in index: it was built with --min-length %d" % (args.label, index.min_length)
+                )
+            raise SystemExit("No %s node %r in index" % (args.of, args.label))
+        result: Any = [
+            {"kind": index.kind(other), "label": index.label(other), "count": weight}
+            for other, weight in sorted(index.neighbors(node, args.kind), key=lambda item: (-item[1], item[0]))
+        ]
+    else:
+        result = [{"hash": label, "crossrefs": count} for label, count in index.crossref_ranking(args.limit)]
+
+    json.dump(result, fp=sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,21 @@ Usage:
     python tools/hash_scanner.py --paths . --output hashes.json
 
 Outputs a JSON payload: `{hash_value: [{"path": str, "line": int, "context": str}, …]}`.
+
+Occurrences are held in an `OccurrenceTable` while scanning: paths and hash
+values are interned once and each hit is stored as a row in parallel integer
+arrays (hash id, path id, line, context start/end columns).  Context strings
+are only sliced back out of the source files when the table is serialised.
+
+With `--approximate`, occurrences are not stored at all.  Each file's hits
+are tallied and fed to a fixed-size `HashFrequencySketch` (see
+`hash_sketch.py`), which counts every hash once per file, and the output is
+an approximate "hottest unresolved hashes" ranking:
+`[{"hash": str, "count": int, "files": int}, …]`.  `--sketch-out` saves the
+sketch and `--merge-sketch` folds in sketches from other workers or runs:
+
+    python tools/hash_scanner.py --approximate --paths hars/2024 --sketch-out 2024.sketch
+    python tools/hash_scanner.py --approximate --paths hars/2025 --merge-sketch 2024.sketch
 """
 
 from __future__ import annotations
@@ -17,8 +32,19 @@ import argparse
 import json
 import re
 import sys
+from array import array
+from collections import Counter
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if __package__ is None or __package__ == "":
+    # Allow running as a script without packaging the repo as a module.
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+    from tools.hash_sketch import DEFAULT_TOP_K, HashFrequencySketch  # type: ignore
+else:  # pragma: no cover
+    from .hash_sketch import DEFAULT_TOP_K, HashFrequencySketch
 
 DEFAULT_PATHS = [Path("docs")]
 DEFAULT_INVENTORY = Path("data/statsig_inventory.json")
@@ -30,6 +56,10 @@ def load_known_ids(inventory_path: Path) -> set[str]:
     if not inventory_path.exists():
         return set()
     data = json.loads(inventory_path.read_text(encoding="utf-8", errors="ignore"))
+    return known_ids_from_inventory(data)
+
+
+def known_ids_from_inventory(data: Dict[str, Any]) -> set[str]:
     known = set(data.get("feature_gates", {}).keys())
     known.update(data.get("dynamic_configs", {}).keys())
     # Secondary exposures / nested references may include additional hashes.
@@ -52,14 +82,117 @@ def iter_files(paths: Iterable[Path]) -> Iterable[Path]:
                 yield child
 
 
-def scan_file(path: Path, min_length: int, known: set[str]) -> Dict[str, List[Dict[str, str]]]:
-    results: Dict[str, List[Dict[str, str]]] = {}
+class OccurrenceTable:
+    """Column-oriented store of hash occurrences.
+
+    Each occurrence is one row across the `hash_ids`, `path_ids`, `lines`,
+    `starts` and `ends` arrays.  `starts`/`ends` are column offsets of the
+    context window within the source line; the text itself is recovered by
+    `to_dict()`.
+    """
+
+    __slots__ = ("paths", "hashes", "_path_index", "_hash_index", "hash_ids", "path_ids", "lines", "starts", "ends")
+
+    def __init__(self) -> None:
+        self.paths: List[str] = []
+        self.hashes: List[str] = []
+        self._path_index: Dict[str, int] = {}
+        self._hash_index: Dict[str, int] = {}
+        self.hash_ids = array("I")
+        self.path_ids = array("I")
+        self.lines = array("I")
+        self.starts = array("I")
+        self.ends = array("I")
+
+    def __len__(self) -> int:
+        return len(self.hash_ids)
+
+    def __bool__(self) -> bool:
+        return len(self.hash_ids) > 0
+
+    def intern_path(self, path: str) -> int:
+        idx = self._path_index.get(path)
+        if idx is None:
+            idx = self._path_index[path] = len(self.paths)
+            self.paths.append(path)
+        return idx
+
+    def intern_hash(self, value: str) -> int:
+        idx = self._hash_index.get(value)
+        if idx is None:
+            idx = self._hash_index[value] = len(self.hashes)
+            self.hashes.append(value)
+        return idx
+
+    def add(self, value: str, path_id: int, line: int, start: int, end: int) -> None:
+        self.hash_ids.append(self.intern_hash(value))
+        self.path_ids.append(path_id)
+        self.lines.append(line)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, other: "OccurrenceTable") -> None:
+        """Append all rows of `other`, remapping its interned ids into this table."""
+        hash_map = [self.intern_hash(value) for value in other.hashes]
+        path_map = [self.intern_path(path) for path in other.paths]
+        if hash_map == list(range(len(hash_map))):
+            self.hash_ids.extend(other.hash_ids)
+        else:
+            self.hash_ids.extend(array("I", (hash_map[i] for i in other.hash_ids)))
+        if path_map == list(range(len(path_map))):
+            self.path_ids.extend(other.path_ids)
+        else:
+            self.path_ids.extend(array("I", (path_map[i] for i in other.path_ids)))
+        self.lines.extend(other.lines)
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+
+    def _contexts(self) -> List[str]:
+        """Re-read each source file once and slice out every row's context."""
+        contexts = [""] * len(self)
+        rows_by_path: Dict[int, List[int]] = {}
+        for row, path_id in enumerate(self.path_ids):
+            rows_by_path.setdefault(path_id, []).append(row)
+
+        for path_id, rows in rows_by_path.items():
+            try:
+                lines = Path(self.paths[path_id]).read_text(encoding="utf-8", errors="ignore").splitlines()
+            except Exception:
+                continue
+            for row in rows:
+                lineno = self.lines[row]
+                if lineno <= len(lines):
+                    contexts[row] = lines[lineno - 1][self.starts[row]:self.ends[row]].strip()
+        return contexts
+
+    def to_dict(self) -> Dict[str, List[Dict[str, str]]]:
+        """Materialise the `{hash_value: [{path, line, context}, …]}` output, sorted by hash."""
+        contexts = self._contexts()
+        rows_by_hash: Dict[int, List[int]] = {}
+        for row, hash_id in enumerate(self.hash_ids):
+            rows_by_hash.setdefault(hash_id, []).append(row)
+
+        output: Dict[str, List[Dict[str, str]]] = {}
+        for hash_id in sorted(rows_by_hash, key=lambda idx: self.hashes[idx]):
+            output[self.hashes[hash_id]] = [
+                {
+                    "path": self.paths[self.path_ids[row]],
+                    "line": self.lines[row],
+                    "context": contexts[row],
+                }
+                for row in rows_by_hash[hash_id]
+            ]
+        return output
+
+
+def iter_matches(path: Path, min_length: int, known: set[str]) -> Iterator[Tuple[str, int, int, int]]:
+    """Yield `(value, line, context_start, context_end)` for each unmatched literal in `path`."""
     pattern = re.compile(r'"(\d{%d,})"' % min_length)
 
     try:
         lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
     except Exception:
-        return results
+        return
 
     for lineno, line in enumerate(lines, start=1):
         for match in pattern.finditer(line):
@@ -67,23 +200,38 @@ def scan_file(path: Path, min_length: int, known: set[str]) -> Dict[str, List[Di
             if value in known:
                 continue
             start = max(0, match.start() - CONTEXT_WINDOW)
-            end = match.end() + CONTEXT_WINDOW
+            end = min(len(line), match.end() + CONTEXT_WINDOW)
             context = line[start:end]
             if any(token in context for token in CALL_GUARDS):
                 continue
-            results.setdefault(value, []).append(
-                {
-                    "path": str(path),
-                    "line": lineno,
-                    "context": context.strip(),
-                }
-            )
+            yield value, lineno, start, end
+
+
+def scan_file(
+    path: Path,
+    min_length: int,
+    known: set[str],
+    table: Optional[OccurrenceTable] = None,
+) -> OccurrenceTable:
+    """Record unmatched literals in `path`, appending to `table` when given."""
+    results = table if table is not None else OccurrenceTable()
+    path_id: Optional[int] = None
+    for value, lineno, start, end in iter_matches(path, min_length, known):
+        if path_id is None:
+            path_id = results.intern_path(str(path))
+        results.add(value, path_id, lineno, start, end)
     return results
 
 
-def merge_results(dest: Dict[str, List[Dict[str, str]]], src: Dict[str, List[Dict[str, str]]]) -> None:
-    for key, entries in src.items():
-        dest.setdefault(key, []).extend(entries)
+def sketch_file(path: Path, min_length: int, known: set[str], sketch: HashFrequencySketch) -> None:
+    """Tally unmatched literals in `path` and feed them to `sketch` without storing occurrences."""
+    counts: Counter[str] = Counter(value for value, _lineno, _start, _end in iter_matches(path, min_length, known))
+    if counts:
+        sketch.add_file(counts)
+
+
+def merge_results(dest: OccurrenceTable, src: OccurrenceTable) -> None:
+    dest.extend(src)
 
 
 def main() -> None:
@@ -92,21 +240,54 @@ def main() -> None:
     parser.add_argument("--min-length", type=int, default=9, help="Minimum digits for a literal to be considered")
     parser.add_argument("--inventory", type=Path, default=DEFAULT_INVENTORY, help="Known IDs inventory JSON")
     parser.add_argument("--output", type=Path, help="Optional output JSON file")
+    parser.add_argument("--approximate", action="store_true", help="Rank hashes with fixed-memory sketches instead of listing occurrences")
+    parser.add_argument("--top-k", type=int, help="Number of heavy hitters tracked in approximate mode (default %d)" % DEFAULT_TOP_K)
+    parser.add_argument("--sketch-out", type=Path, help="Save the approximate-mode sketch for later merging")
+    parser.add_argument("--merge-sketch", nargs="*", type=Path, help="Sketch files to merge in approximate mode")
     args = parser.parse_args()
+    if not args.approximate:
+        for flag, value in (("--top-k", args.top_k), ("--sketch-out", args.sketch_out), ("--merge-sketch", args.merge_sketch)):
+            if value is not None:
+                parser.error("%s requires --approximate" % flag)
+    top_k = DEFAULT_TOP_K if args.top_k is None else args.top_k
+    if top_k < 1:
+        parser.error("--top-k must be at least 1")
 
     known_ids = load_known_ids(args.inventory)
-    aggregate: Dict[str, List[Dict[str, str]]] = {}
+
+    if args.approximate:
+        sketch = HashFrequencySketch(top_k=top_k)
+        for file_path in iter_files(args.paths or DEFAULT_PATHS):
+            sketch_file(file_path, args.min_length, known_ids, sketch)
+        for sketch_path in args.merge_sketch or []:
+            try:
+                sketch.merge(HashFrequencySketch.load(sketch_path))
+            except (OSError, KeyError, ValueError) as exc:
+                raise SystemExit("Cannot merge sketch %s: %s" % (sketch_path, exc))
+        if args.sketch_out:
+            sketch.save(args.sketch_out)
+        print("~%d distinct unmatched literals" % sketch.distinct_hashes(), file=sys.stderr)
+        report = sketch.report()
+        if not report:
+            print("No unmatched numeric literals found.")
+            return
+        text = json.dumps(report, indent=2)
+        if args.output:
+            args.output.write_text(text + "\n", encoding="utf-8")
+        else:
+            print(text)
+        return
+
+    aggregate = OccurrenceTable()
 
     for file_path in iter_files(args.paths or DEFAULT_PATHS):
-        file_results = scan_file(file_path, args.min_length, known_ids)
-        if file_results:
-            merge_results(aggregate, file_results)
+        scan_file(file_path, args.min_length, known_ids, aggregate)
 
     if not aggregate:
         print("No unmatched numeric literals found.")
         return
 
-    output = {key: entries for key, entries in sorted(aggregate.items(), key=lambda item: item[0])}
+    output = aggregate.to_dict()
     text = json.dumps(output, indent=2)
 
     if args.output:
@@ -0,0 +1,260 @@
+"""Fixed-memory sketches for approximate hash frequency ranking.
+
+`hash_scanner.py --approximate` feeds every unmatched literal into a
+`HashFrequencySketch` instead of materialising each occurrence:
+
+  - a count-min sketch estimates how often each hash value occurs,
+  - a second count-min sketch, fed once per value per file, estimates how
+    many files each value appears in,
+  - a top-K heavy-hitters table keeps the current hottest candidates,
+  - a HyperLogLog estimates how many distinct unmatched values were seen.
+
+Memory is bounded by the sketch dimensions, not by the size of the corpus.
+Sketches built with the same parameters can be merged, so parallel workers
+(or successive runs over new captures) can each write a sketch file and a
+final pass combines them.  Hashing uses BLAKE2b, so results are stable
+across processes and Python versions.
+
+Both counts are over-estimates bounded by the count-min error, and cover
+every file fed to the sketch, including files seen before a value entered
+the top-K table.  Merged sketches should cover disjoint sets of files: a file
+scanned by two workers is counted twice.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List
+
+SKETCH_FORMAT = 2
+DEFAULT_WIDTH = 1 << 14
+DEFAULT_DEPTH = 4
+DEFAULT_TOP_K = 200
+DEFAULT_HLL_PRECISION = 10
+
+
+def _hash64(value: str, person: bytes = b"") -> int:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8, person=person).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _pack(values: array) -> str:
+    data = array(values.typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def _unpack(typecode: str, text: str) -> array:
+    data = array(typecode)
+    data.frombytes(base64.b64decode(text))
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+class CountMinSketch:
+    """Count-min sketch over string keys (`depth` rows of `width` counters)."""
+
+    __slots__ = ("width", "depth", "table")
+
+    def __init__(self, width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH) -> None:
+        self.width = width
+        self.depth = depth
+        self.table = array("Q", bytes(8 * width * depth))
+
+    def _cells(self, value: str) -> List[int]:
+        h = _hash64(value, b"cms")
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, value: str, count: int = 1) -> int:
+        """Increment `value` and return its updated estimate."""
+        table = self.table
+        estimate = None
+        for cell in self._cells(value):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        return estimate or 0
+
+    def estimate(self, value: str) -> int:
+        return min(self.table[cell] for cell in self._cells(value))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge count-min sketches with different dimensions")
+        table = self.table
+        for idx, count in enumerate(other.table):
+            if count:
+                table[idx] += count
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "table": _pack(self.table)}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        table = _unpack("Q", data["table"])
+        if len(table) != sketch.width * sketch.depth:
+            raise ValueError("Count-min table has %d counters, expected %d" % (len(table), sketch.width * sketch.depth))
+        sketch.table = table
+        return sketch
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with `2 ** precision` one-byte registers."""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        h = _hash64(value, b"hll")
+        idx = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if self.precision != other.precision:
+            raise ValueError("Cannot merge HyperLogLog registers with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def copy(self) -> "HyperLogLog":
+        clone = HyperLogLog(self.precision)
+        clone.registers = bytearray(self.registers)
+        return clone
+
+    def to_json(self) -> str:
+        return base64.b64encode(bytes(self.registers)).decode("ascii")
+
+    @classmethod
+    def from_json(cls, text: str, precision: int) -> "HyperLogLog":
+        hll = cls(precision)
+        registers = bytearray(base64.b64decode(text))
+        if len(registers) != len(hll.registers):
+            raise ValueError("HyperLogLog has %d registers, expected %d" % (len(registers), len(hll.registers)))
+        hll.registers = registers
+        return hll
+
+
+class HashFrequencySketch:
+    """Count-min occurrence and file counts plus a top-K table of hot candidates."""
+
+    __slots__ = ("cms", "file_cms", "distinct", "top_k", "hll_precision", "heavy", "_floor")
+
+    def __init__(
+        self,
+        width: int = DEFAULT_WIDTH,
+        depth: int = DEFAULT_DEPTH,
+        top_k: int = DEFAULT_TOP_K,
+        hll_precision: int = DEFAULT_HLL_PRECISION,
+    ) -> None:
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        self.cms = CountMinSketch(width, depth)
+        self.file_cms = CountMinSketch(width, depth)
+        self.distinct = HyperLogLog(hll_precision)
+        self.top_k = top_k
+        self.hll_precision = hll_precision
+        self.heavy: Dict[str, int] = {}
+        self._floor = 0
+
+    def _admit(self, value: str, estimate: int) -> None:
+        heavy = self.heavy
+        if value in heavy:
+            heavy[value] = estimate
+            return
+        if len(heavy) >= self.top_k:
+            if estimate <= self._floor:
+                return
+            victim = min(heavy, key=heavy.__getitem__)
+            if estimate <= heavy[victim]:
+                self._floor = heavy[victim]
+                return
+            del heavy[victim]
+        heavy[value] = estimate
+        if len(heavy) >= self.top_k:
+            self._floor = min(heavy.values())
+
+    def add_file(self, counts: Dict[str, int]) -> None:
+        """Add one file's `{value: occurrences}`; each value counts once towards its file total."""
+        for value, count in counts.items():
+            self.file_cms.add(value)
+            self.distinct.add(value)
+            self._admit(value, self.cms.add(value, count))
+
+    def merge(self, other: "HashFrequencySketch") -> None:
+        if self.hll_precision != other.hll_precision:
+            raise ValueError("Cannot merge sketches with different HyperLogLog precision")
+        self.cms.merge(other.cms)
+        self.file_cms.merge(other.file_cms)
+        self.distinct.merge(other.distinct)
+        candidates = set(self.heavy) | set(other.heavy)
+        ranked = sorted(candidates, key=lambda value: (-self.cms.estimate(value), value))[: self.top_k]
+        self.heavy = {value: self.cms.estimate(value) for value in ranked}
+        self._floor = min(self.heavy.values()) if len(self.heavy) >= self.top_k else 0
+
+    def distinct_hashes(self) -> int:
+        """Estimated number of distinct unmatched values seen, tracked or not."""
+        return self.distinct.count()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Return the tracked hashes ranked by estimated occurrence count."""
+        ranked = sorted(self.heavy.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {"hash": value, "count": count, "files": self.file_cms.estimate(value)}
+            for value, count in ranked
+        ]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "format": SKETCH_FORMAT,
+            "top_k": self.top_k,
+            "hll_precision": self.hll_precision,
+            "cms": self.cms.to_json(),
+            "file_cms": self.file_cms.to_json(),
+            "distinct": self.distinct.to_json(),
+            "heavy": self.heavy,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "HashFrequencySketch":
+        if data.get("format") != SKETCH_FORMAT:
+            raise ValueError("Unsupported sketch format: %r" % data.get("format"))
+        sketch = cls(top_k=data["top_k"], hll_precision=data["hll_precision"])
+        sketch.cms = CountMinSketch.from_json(data["cms"])
+        sketch.file_cms = CountMinSketch.from_json(data["file_cms"])
+        if (sketch.file_cms.width, sketch.file_cms.depth) != (sketch.cms.width, sketch.cms.depth):
+            raise ValueError("Occurrence and file count-min sketches have different dimensions")
+        sketch.distinct = HyperLogLog.from_json(data["distinct"], sketch.hll_precision)
+        sketch.heavy = {value: int(count) for value, count in data["heavy"].items()}
+        if len(sketch.heavy) >= sketch.top_k:
+            sketch._floor = min(sketch.heavy.values())
+        return sketch
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_json()) + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "HashFrequencySketch":
+        return cls.from_json(json.loads(path.read_text(encoding="utf-8")))
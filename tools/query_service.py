@@ -0,0 +1,327 @@
+"""Warm local query service over the Statsig inventory, hash catalog and findings.
+
+Instead of starting a Python process (and re-parsing the inventory JSON) for
+every lookup, run the service once and send it batches of queries over
+localhost HTTP:
+
+    python tools/query_service.py serve --findings hashes.json obfuscation.json --graph hash_graph.idx
+
+    curl -s localhost:8765/query -d '[{"op": "is_known", "id": "879591222"},
+                                      {"op": "captures", "id": "879591222"}]'
+
+or from Python, reusing one keep-alive connection:
+
+    from tools.query_service import QueryClient
+    results = QueryClient().query([{"op": "gate", "id": "16480203"}])
+
+Supported ops (every query also takes an `id` or `path`):
+  - `is_known` – hash is a known gate/config (same rules as `hash_scanner.load_known_ids`)
+  - `gate`     – observed values of a feature gate, or null
+  - `config`   – dynamic config summary from the inventory, or null
+  - `catalog`  – `research/hash_resolution_catalog.md` entry (crossrefs, null when
+                 the catalog says "varies"; values; categories)
+  - `captures` – capture paths containing the hash (findings files and `--graph` index)
+  - `findings` – findings entries recorded for a capture `path`
+
+Results come back as `{"results": [...]}` in request order; a failed query
+yields `{"error": str}` in its slot.  Source files are re-checked at most
+every `--reload-interval` seconds and the indexes are rebuilt when any of
+them changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+if __package__ is None or __package__ == "":
+    # Allow running as a script without packaging the repo as a module.
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+    from tools.hash_graph import GraphIndex  # type: ignore
+    from tools.hash_scanner import DEFAULT_INVENTORY, known_ids_from_inventory  # type: ignore
+else:  # pragma: no cover
+    from .hash_graph import GraphIndex
+    from .hash_scanner import DEFAULT_INVENTORY, known_ids_from_inventory
+
+DEFAULT_CATALOG = Path("research/hash_resolution_catalog.md")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RELOAD_INTERVAL = 1.0
+
+CATALOG_LINE = re.compile(r"^`(\d+)` \((?:crossrefs: )?(\d+|varies)\) → (.*)$")
+CATALOG_ENTRY = re.compile(r"^`\d+`")
+
+
+def load_catalog(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    catalog: Dict[str, Dict[str, Any]] = {}
+    for lineno, line in enumerate(path.read_text(encoding="utf-8", errors="ignore").splitlines(), 1):
+        match = CATALOG_LINE.match(line.strip())
+        if not match:
+            if CATALOG_ENTRY.match(line.strip()):
+                print("%s:%d: unrecognised catalog entry skipped" % (path, lineno), file=sys.stderr)
+            continue
+        rest, _, categories = match.group(3).partition(" ; categories:")
+        values = [] if rest.strip() == "no_plaintext" else [
+            value.strip().strip("`") for value in rest.split(";") if value.strip()
+        ]
+        catalog[match.group(1)] = {
+            "crossrefs": None if match.group(2) == "varies" else int(match.group(2)),
+            "values": values,
+            "categories": [tag for tag in categories.split("/") if tag],
+        }
+    return catalog
+
+
+def load_findings(paths: Iterable[Path]) -> Dict[str, Any]:
+    """Index scanner outputs by hash (hash_scanner) and by capture path (all scanners)."""
+    by_hash: Dict[str, Set[str]] = {}
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for path in paths:
+        if not path.exists():
+            continue
+        data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
+        if isinstance(data, dict):
+            # hash_scanner output: {hash_value: [{path, line, context}, …]}
+            for value, entries in data.items():
+                if not isinstance(entries, list):
+                    continue
+                for entry in entries:
+                    if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+                        continue
+                    by_hash.setdefault(value, set()).add(entry["path"])
+                    by_path.setdefault(entry["path"], []).append(dict(entry, hash=value))
+        elif isinstance(data, list):
+            # obfuscation_scanner / service_function_scanner output
+            for entry in data:
+                if isinstance(entry, dict) and isinstance(entry.get("path"), str):
+                    by_path.setdefault(entry["path"], []).append(entry)
+    return {"by_hash": by_hash, "by_path": by_path}
+
+
+class Indexes:
+    """One immutable snapshot of all loaded sources."""
+
+    def __init__(self, inventory: Path, catalog: Path, findings: List[Path], graph: Optional[Path]) -> None:
+        data = json.loads(inventory.read_text(encoding="utf-8", errors="ignore")) if inventory.exists() else {}
+        self.gates: Dict[str, Any] = data.get("feature_gates", {})
+        self.configs: Dict[str, Any] = data.get("dynamic_configs", {})
+        self.known = known_ids_from_inventory(data)
+        self.catalog = load_catalog(catalog)
+        found = load_findings(findings)
+        self.findings_by_hash: Dict[str, Set[str]] = found["by_hash"]
+        self.findings_by_path: Dict[str, List[Dict[str, Any]]] = found["by_path"]
+        # Read a private copy rather than mapping the file: a rebuild can replace
+        # or rewrite it underneath a live snapshot.
+        self.graph = GraphIndex(graph.read_bytes()) if graph is not None and graph.exists() else None
+        self.loaded_at = time.time()
+
+    def captures(self, value: str) -> List[str]:
+        paths = set(self.findings_by_hash.get(value, ()))
+        if self.graph is not None:
+            node = self.graph.find("hash", value)
+            if node is not None:
+                paths.update(self.graph.label(other) for other, _weight in self.graph.neighbors(node, "file"))
+        return sorted(paths)
+
+
+OPS: Dict[str, Callable[[Indexes, Dict[str, Any]], Any]] = {
+    "is_known": lambda idx, q: str(q["id"]) in idx.known,
+    "gate": lambda idx, q: idx.gates.get(str(q["id"])),
+    "config": lambda idx, q: idx.configs.get(str(q["id"])),
+    "catalog": lambda idx, q: idx.catalog.get(str(q["id"])),
+    "captures": lambda idx, q: idx.captures(str(q["id"])),
+    "findings": lambda idx, q: idx.findings_by_path.get(q["path"], []),
+}
+
+
+class QueryStore:
+    """Holds the current `Indexes` snapshot and swaps in a new one when sources change."""
+
+    def __init__(
+        self,
+        inventory: Path,
+        catalog: Path,
+        findings: List[Path],
+        graph: Optional[Path] = None,
+        reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+    ) -> None:
+        self._sources = (inventory, catalog, list(findings), graph)
+        self._watched = [path for path in [inventory, catalog, *findings, graph] if path is not None]
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._stamps = self._stat()
+        self._failed_stamps: Optional[List[Optional[int]]] = None
+        self.indexes = Indexes(*self._sources)
+
+    def _stat(self) -> List[Optional[int]]:
+        stamps: List[Optional[int]] = []
+        for path in self._watched:
+            try:
+                stamps.append(path.stat().st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return stamps
+
+    def maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self._reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self._reload_interval:
+                return
+            self._checked_at = now
+            stamps = self._stat()
+            if stamps == self._stamps or stamps == self._failed_stamps:
+                return
+            try:
+                indexes = Indexes(*self._sources)
+            except Exception as exc:  # noqa: BLE001 - any bad source keeps the old snapshot
+                # Keep serving the previous snapshot (e.g. file caught mid-write) and
+                # do not retry until one of the sources changes again.
+                print("Reload failed: %s" % exc, file=sys.stderr)
+                self._failed_stamps = stamps
+                return
+            self._stamps = stamps
+            self._failed_stamps = None
+            self.indexes = indexes
+
+    def run(self, queries: List[Dict[str, Any]]) -> List[Any]:
+        self.maybe_reload()
+        indexes = self.indexes
+        results: List[Any] = []
+        for query in queries:
+            try:
+                results.append(OPS[query["op"]](indexes, query))
+            except KeyError as exc:
+                results.append({"error": "missing or unknown field: %s" % exc})
+            except (TypeError, AttributeError):
+                results.append({"error": "malformed query"})
+        return results
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    store: QueryStore
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path != "/health":
+            self._send(404, {"error": "not found"})
+            return
+        self.store.maybe_reload()
+        self._send(200, {"loaded_at": self.store.indexes.loaded_at})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        if self.path != "/query":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send(400, {"error": "invalid Content-Length"})
+            self.close_connection = True
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"[]")
+        except json.JSONDecodeError:
+            self._send(400, {"error": "invalid JSON"})
+            return
+        queries = payload.get("queries", []) if isinstance(payload, dict) else payload
+        if not isinstance(queries, list):
+            self._send(400, {"error": "expected a list of queries"})
+            return
+        self._send(200, {"results": self.store.run(queries)})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class QueryClient:
+    """Minimal client that keeps one HTTP connection open across batches."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        self._conn = http.client.HTTPConnection(host, port)
+
+    def query(self, queries: List[Dict[str, Any]]) -> List[Any]:
+        body = json.dumps(queries).encode("utf-8")
+        self._conn.request("POST", "/query", body=body, headers={"Content-Type": "application/json"})
+        response = self._conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(payload.get("error", "query failed"))
+        return payload["results"]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def serve(store: QueryStore, host: str, port: int) -> None:
+    handler = type("BoundQueryHandler", (QueryHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    print("Serving queries on http://%s:%d/query" % (host, port), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="Load the indexes and serve queries")
+    serve_cmd.add_argument("--inventory", type=Path, default=DEFAULT_INVENTORY, help="Statsig inventory JSON")
+    serve_cmd.add_argument("--catalog", type=Path, default=DEFAULT_CATALOG, help="Hash resolution catalog markdown")
+    serve_cmd.add_argument("--findings", nargs="*", type=Path, default=[], help="Scanner output JSON files")
+    serve_cmd.add_argument("--graph", type=Path, help="Optional hash_graph.py index for capture lookups")
+    serve_cmd.add_argument("--reload-interval", type=float, default=DEFAULT_RELOAD_INTERVAL, help="Seconds between source change checks")
+    serve_cmd.add_argument("--host", default=DEFAULT_HOST)
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    query_cmd = commands.add_parser("query", help="Send a batch of JSON queries (one per stdin line)")
+    query_cmd.add_argument("--host", default=DEFAULT_HOST)
+    query_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        store = QueryStore(args.inventory, args.catalog, args.findings, args.graph, args.reload_interval)
+        serve(store, args.host, args.port)
+        return
+
+    queries = [json.loads(line) for line in sys.stdin if line.strip()]
+    client = QueryClient(args.host, args.port)
+    try:
+        json.dump(client.query(queries), fp=sys.stdout, indent=2)
+        print()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
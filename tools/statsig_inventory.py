@@ -50,30 +50,32 @@ def _is_text_file(path: Path) -> bool:
     return path.suffix == "" and path.stat().st_size <= 5 * 1024 * 1024
 
 
-def _read_configs(path: Path) -> Dict[str, Dict[str, Any]]:
+def _read_configs(path: Path) -> List[Dict[str, Dict[str, Any]]]:
     if path.suffix.lower() == ".har":
         try:
             return _process_har(path)
         except json.JSONDecodeError:
-            return {}
+            return []
 
     if not _is_text_file(path):
-        return {}
+        return []
 
     try:
         text = path.read_text(encoding="utf-8", errors="ignore")
     except (OSError, UnicodeDecodeError):
-        return {}
+        return []
 
     if "feature_gates" not in text:
-        return {}
+        return []
 
-    return _process_text(text)
+    configs = _process_text(text)
+    return [configs] if configs else []
 
 
-def _merge_configs(aggregate: Dict[str, Dict[str, Any]], configs: Dict[str, Dict[str, Any]]) -> None:
-    for name, data in configs.items():
-        aggregate.setdefault(name, {}).setdefault("instances", []).append(data)
+def _merge_configs(aggregate: Dict[str, Dict[str, Any]], config_sets: List[Dict[str, Dict[str, Any]]]) -> None:
+    for configs in config_sets:
+        for name, data in configs.items():
+            aggregate.setdefault(name, {}).setdefault("instances", []).append(data)
 
 
 def _summarise(aggregate: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
@@ -1,20 +1,26 @@
 """Statsig payload resolver for ChatGPT HAR captures.
 
-Given either a HAR file or a raw HTML dump that embeds the React Server
-Component bootstrap (`enqueue("…");`), this script rematerialises the
-`feature_gates` / `dynamic_configs` payloads and reports a sanitised
-inventory.  It is designed for local analysis of captured traffic where the
-standard JSON summary is inconveniently encoded with positional indices.
+Given either a HAR file, a raw HTML dump that embeds the React Server
+Component bootstrap (`enqueue("…");`), or a saved `.data` response, this
+script rematerialises the `feature_gates` / `dynamic_configs` payloads and
+reports a sanitised inventory.  It is designed for local analysis of captured
+traffic where the standard JSON summary is inconveniently encoded with
+positional indices.  Payloads are decoded incrementally by `FlightStream`, so
+every bootstrap chunk and every streamed `.data` response in a HAR contributes.
 
 Usage:
 
     python tools/statsig_resolver.py path/to/file.har
+    python tools/statsig_resolver.py --routes path/to/file.har
 
 Outputs JSON with two dictionaries:
   - `feature_gates`: `{hashed_gate_id: [observed boolean values...]}`
   - `dynamic_configs`: `{hashed_config_id: {keys: [...], groups: [...],
       rule_ids: [...], value_types: {key: type_name}}}`
 
+With `--routes`, it instead prints `{response_url: [top-level route keys]}`
+for every streamed response in a HAR.
+
 The script purposefully reports only metadata about each config to avoid
 leaking full payload contents (tokens, identifiers, etc.).
 """
@@ -28,113 +34,234 @@ import re
 import sys
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
-
-
-PATTERN = re.compile(r'enqueue\("(.*?)"\);')
-
-
-def _parse_root(text: str) -> Optional[List[Any]]:
-    match_iter = PATTERN.findall(text)
-    if not match_iter:
-        return None
-    try:
-        return json.loads(match_iter[0].encode("utf-8").decode("unicode_escape"))
-    except json.JSONDecodeError:
-        return None
-
-
-def _resolve_configs(root: List[Any]) -> Dict[str, Dict[str, Any]]:
-    root_len = len(root)
-    cache: Dict[int, Any] = {}
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+PATTERN = re.compile(r'enqueue\("((?:[^"\\]|\\.)*)"\);')
+STREAM_MIME_TYPES = ("text/x-component", "text/x-script")
+JS_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}|.)", re.DOTALL)
+JSON_ESCAPES = set('"\\/bfnrtu')
+JS_CONTROL_ESCAPES = {"v": "\v", "0": "\0"}
+DEFAULT_CACHE_SIZE = 4096
+
+
+class FlightStream:
+    """Incremental decoder for the streamed payloads behind `enqueue("…")` and `.data` routes.
+
+    The first row is a flat JSON array; every later `P<id>:<json>` / `E<id>:<json>`
+    row resolves promise `<id>` and either points at an existing index or appends
+    a new flat array to the same index space.  Rows are decoded as soon as their
+    terminating newline arrives and Statsig configs are collected from each new
+    batch of values.
+
+    Resolved values are cached across rows, so a later row (or `root` /
+    `resolve_promise`) that points back at an already-resolved object reuses it
+    instead of walking it again; results are shared, not copied, and must be
+    treated as read-only.  Resolutions that touched a cycle or an index past the
+    end of the table depend on where they were reached from and are not cached.
+
+    Memory: the cache holds at most `cache_size` resolved entries and evicts the
+    oldest first.  The raw `values` table is retained for the whole response,
+    because any later row may reference any earlier index.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.cache_size = cache_size
+        self.values: List[Any] = []
+        self.promises: Dict[int, int] = {}
+        self.configs: Dict[str, Dict[str, Any]] = {}
+        self._cache: Dict[int, Any] = {}
+        self._unstable = 0
+        self._pending: List[str] = []
+        self._root: Optional[int] = None
+        self._failed = False
+
+    def feed(self, chunk: str) -> None:
+        if "\n" not in chunk:
+            self._pending.append(chunk)
+            return
+        head, *lines = chunk.split("\n")
+        self._pending.append(head)
+        lines.insert(0, "".join(self._pending))
+        self._pending = [lines.pop()]
+        for line in lines:
+            self._row(line)
+
+    def close(self) -> None:
+        self._row("".join(self._pending))
+        self._pending = []
+
+    @property
+    def root(self) -> Any:
+        if self._root is None:
+            return None
+        return self.resolve_index(self._root)
+
+    def resolve_promise(self, promise_id: int) -> Any:
+        idx = self.promises.get(promise_id)
+        return None if idx is None else self.resolve_index(idx)
+
+    def _row(self, line: str) -> None:
+        if self._failed or not line.strip():
+            return
+        try:
+            if self._root is None:
+                self._root = self._append(json.loads(line))
+                return
+            tag, (ident, _, body) = line[0], line[1:].partition(":")
+            if tag not in "PE" or not ident.isdigit():
+                return
+            idx = self._append(json.loads(body))
+        except (json.JSONDecodeError, ValueError):
+            # A root that is not a flat array means this is not a stream at all.
+            self._failed = self._root is None
+            return
+        if tag == "P":
+            self.promises[int(ident)] = idx
+
+    def _append(self, parsed: Any) -> int:
+        if isinstance(parsed, int) and not isinstance(parsed, bool):
+            return parsed
+        if not isinstance(parsed, list) or not parsed:
+            raise ValueError("expected a non-empty flat array")
+        start = len(self.values)
+        self.values.extend(parsed)
+        for idx in range(start, len(self.values)):
+            if not isinstance(self.values[idx], dict):
+                continue
+            resolved = self.resolve_index(idx)
+            if not (isinstance(resolved, dict) and "name" in resolved and "value" in resolved):
+                continue
+            name = resolved["name"]
+            if isinstance(name, str) and name.isdigit():
+                self.configs[name] = resolved
+        return start
 
-    def resolve_index(idx: Any, stack: Set[int]) -> Any:
+    def resolve_index(self, idx: Any, stack: Optional[Set[int]] = None) -> Any:
         if isinstance(idx, bool) or isinstance(idx, str) or idx is None:
             return idx
         if not isinstance(idx, int):
             return idx
+        if stack is None:
+            stack = set()
         if idx in stack:
+            self._unstable += 1
             return "CYCLE"
         if idx == -5:
             return None
         if idx == -7:
             return "UNSET"
-        if idx < 0 or idx >= root_len:
+        if idx < 0 or idx >= len(self.values):
+            self._unstable += 1
             return idx
-        if idx in cache:
-            return cache[idx]
+        if idx in self._cache:
+            return self._cache[idx]
 
-        value = root[idx]
-        stack = set(stack)
+        unstable = self._unstable
+        value = self.values[idx]
         stack.add(idx)
-
-        if isinstance(value, bool) or isinstance(value, str) or value is None:
-            cache[idx] = value
-            return value
-        if isinstance(value, int):
-            result = resolve_index(value, stack)
-            cache[idx] = result
-            return result
-        if isinstance(value, list):
-            if len(value) == 2 and value[0] == "P" and isinstance(value[1], int):
-                result = {"resource_ref": value[1]}
+        try:
+            if isinstance(value, bool) or isinstance(value, str) or value is None:
+                result = value
+            elif isinstance(value, int):
+                result = self.resolve_index(value, stack)
+            elif isinstance(value, list):
+                if len(value) == 2 and value[0] == "P" and isinstance(value[1], int):
+                    result = {"resource_ref": value[1]}
+                else:
+                    result = [self._resolve_any(v, stack) for v in value]
+            elif isinstance(value, dict):
+                resolved: Dict[str, Any] = {}
+                for key, val in value.items():
+                    new_key = key
+                    if isinstance(key, str) and key.startswith("_"):
+                        candidate = self.resolve_index(int(key[1:]), stack)
+                        if isinstance(candidate, str):
+                            new_key = candidate
+                    resolved[new_key] = self._resolve_any(val, stack)
+                result = resolved
             else:
-                result = [resolve_any(v, stack) for v in value]
+                result = value
+        finally:
+            stack.discard(idx)
+
+        if self._unstable == unstable:
+            cache = self._cache
+            if cache and len(cache) >= self.cache_size:
+                del cache[next(iter(cache))]
             cache[idx] = result
-            return result
-        if isinstance(value, dict):
-            resolved: Dict[str, Any] = {}
-            for key, val in value.items():
-                new_key = key
-                if isinstance(key, str) and key.startswith("_"):
-                    key_idx = int(key[1:])
-                    candidate = resolve_index(key_idx, stack)
-                    if isinstance(candidate, str):
-                        new_key = candidate
-                resolved[new_key] = resolve_any(val, stack)
-            cache[idx] = resolved
-            return resolved
-
-        cache[idx] = value
-        return value
-
-    def resolve_any(val: Any, stack: Set[int]) -> Any:
+        return result
+
+    def _resolve_any(self, val: Any, stack: Set[int]) -> Any:
         if isinstance(val, bool) or isinstance(val, str) or val is None:
             return val
         if isinstance(val, int):
-            return resolve_index(val, stack)
+            return self.resolve_index(val, stack)
         if isinstance(val, list):
             if len(val) == 2 and val[0] == "P" and isinstance(val[1], int):
                 return {"resource_ref": val[1]}
-            return [resolve_any(v, stack) for v in val]
+            return [self._resolve_any(v, stack) for v in val]
         if isinstance(val, dict):
             return {(
-                resolve_index(int(k[1:]), stack) if isinstance(k, str) and k.startswith("_") else k
-            ): resolve_any(v, stack) for k, v in val.items()}
+                self.resolve_index(int(k[1:]), stack) if isinstance(k, str) and k.startswith("_") else k
+            ): self._resolve_any(v, stack) for k, v in val.items()}
         return val
 
-    configs: Dict[str, Dict[str, Any]] = {}
-    for idx, item in enumerate(root):
-        if not isinstance(item, dict):
-            continue
-        resolved = resolve_index(idx, set())
-        if not (isinstance(resolved, dict) and "name" in resolved and "value" in resolved):
-            continue
-        name = resolved["name"]
-        if isinstance(name, str) and name.isdigit():
-            configs[name] = resolved
 
-    return configs
+def _json_escape(match: "re.Match[str]") -> str:
+    escape = match.group(1)
+    if escape[0] == "x" and len(escape) == 3:
+        return "\\u00" + escape[1:]
+    if escape.startswith("u{"):
+        return json.dumps(chr(int(escape[2:-1], 16)))[1:-1]
+    if escape in JSON_ESCAPES:
+        return match.group(0)
+    if escape in "\r\n\u2028\u2029":
+        return ""  # line continuation
+    return json.dumps(JS_CONTROL_ESCAPES.get(escape, escape))[1:-1]
+
+
+def _decode_js_string(body: str) -> str:
+    """Decode a JS string literal body by rewriting JS-only escapes into JSON ones."""
+    return json.loads('"%s"' % JS_ESCAPE.sub(_json_escape, body), strict=False)
+
+
+def _stream_text(text: str) -> Optional[FlightStream]:
+    """Feed every `enqueue("…")` chunk, or a raw `.data` body, through a `FlightStream`."""
+    stream = FlightStream()
+    matches = PATTERN.finditer(text)
+    first = next(matches, None)
+    if first is not None:
+        for match in (first, *matches):
+            try:
+                stream.feed(_decode_js_string(match.group(1)))
+            except (json.JSONDecodeError, ValueError):
+                continue
+    elif text.lstrip().startswith("["):
+        stream.feed(text)
+    else:
+        return None
+    stream.close()
+    return stream if stream.values else None
+
+
+def _resolve_configs(root: List[Any]) -> Dict[str, Dict[str, Any]]:
+    if not root:
+        return {}
+    stream = FlightStream()
+    stream._root = stream._append(root)
+    return stream.configs
 
 
 def _process_text(text: str) -> Dict[str, Dict[str, Any]]:
-    root = _parse_root(text)
-    if root is None:
+    stream = _stream_text(text)
+    if stream is None:
         return {}
-    return _resolve_configs(root)
+    return stream.configs
 
 
-def _process_har(path: Path) -> Dict[str, Dict[str, Any]]:
+def _iter_har_entries(path: Path) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """Yield `(entry, decoded_body)` for every HAR entry that has a response body."""
     data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
     for entry in data.get("log", {}).get("entries", []):
         content = entry.get("response", {}).get("content", {})
@@ -146,55 +273,85 @@ def _process_har(path: Path) -> Dict[str, Dict[str, Any]]:
                 text = base64.b64decode(text).decode("utf-8", "ignore")
             except (ValueError, UnicodeDecodeError):
                 continue
-        if "feature_gates" not in text:
+        yield entry, text
+
+
+def _iter_har_texts(path: Path) -> Iterator[str]:
+    """Yield the decoded response body of every HAR entry that has one."""
+    for _entry, text in _iter_har_entries(path):
+        yield text
+
+
+def _iter_har_streams(path: Path) -> Iterator[Tuple[str, FlightStream]]:
+    """Yield `(url, stream)` for the HTML bootstrap and every `.data` / RSC response."""
+    for entry, text in _iter_har_entries(path):
+        url = entry.get("request", {}).get("url", "")
+        mime = entry.get("response", {}).get("content", {}).get("mimeType", "")
+        is_data = url.split("?", 1)[0].endswith(".data") or mime.startswith(STREAM_MIME_TYPES)
+        if not is_data and "enqueue(" not in text:
             continue
-        configs = _process_text(text)
-        if configs:
-            return configs
-    return {}
+        stream = _stream_text(text)
+        if stream is not None:
+            yield url, stream
+
 
+def _process_har(path: Path) -> List[Dict[str, Dict[str, Any]]]:
+    """Return the configs of every streamed response, one dict per response."""
+    return [stream.configs for _url, stream in _iter_har_streams(path) if stream.configs]
 
-def _summarise_configs(configs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+
+def _process_har_routes(path: Path) -> Dict[str, List[str]]:
+    """Map each streamed response URL to the top-level keys of its resolved root."""
+    routes: Dict[str, List[str]] = {}
+    for url, stream in _iter_har_streams(path):
+        root = stream.root
+        if isinstance(root, dict):
+            routes[url] = sorted(str(key) for key in root)
+    return routes
+
+
+def _summarise_configs(config_sets: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
     features: Dict[str, List[bool]] = defaultdict(list)
     dynamic: Dict[str, Dict[str, Any]] = {}
 
-    for name, data in configs.items():
-        value = data.get("value")
-        if isinstance(value, bool):
-            if value not in features[name]:
-                features[name].append(value)
-        elif isinstance(value, dict):
-            entry = dynamic.setdefault(name, {
-                "keys": set(),
-                "groups": set(),
-                "rule_ids": set(),
-                "value_types": {}
-            })
-            entry["keys"].update(k for k in value.keys() if isinstance(k, str))
-            group = data.get("group")
-            if isinstance(group, str):
-                entry["groups"].add(group)
-            rule_id = data.get("rule_id")
-            if isinstance(rule_id, str):
-                entry["rule_ids"].add(rule_id)
-            for key, val in value.items():
-                if not isinstance(key, str):
-                    continue
-                if isinstance(val, bool):
-                    summary = "bool"
-                elif isinstance(val, (int, float)):
-                    summary = "number"
-                elif isinstance(val, str):
-                    summary = "string"
-                elif val is None:
-                    summary = "null"
-                elif isinstance(val, list):
-                    summary = "list"
-                elif isinstance(val, dict):
-                    summary = "dict"
-                else:
-                    summary = type(val).__name__
-                entry["value_types"].setdefault(key, set()).add(summary)
+    for configs in config_sets:
+        for name, data in configs.items():
+            value = data.get("value")
+            if isinstance(value, bool):
+                if value not in features[name]:
+                    features[name].append(value)
+            elif isinstance(value, dict):
+                entry = dynamic.setdefault(name, {
+                    "keys": set(),
+                    "groups": set(),
+                    "rule_ids": set(),
+                    "value_types": {}
+                })
+                entry["keys"].update(k for k in value.keys() if isinstance(k, str))
+                group = data.get("group")
+                if isinstance(group, str):
+                    entry["groups"].add(group)
+                rule_id = data.get("rule_id")
+                if isinstance(rule_id, str):
+                    entry["rule_ids"].add(rule_id)
+                for key, val in value.items():
+                    if not isinstance(key, str):
+                        continue
+                    if isinstance(val, bool):
+                        summary = "bool"
+                    elif isinstance(val, (int, float)):
+                        summary = "number"
+                    elif isinstance(val, str):
+                        summary = "string"
+                    elif val is None:
+                        summary = "null"
+                    elif isinstance(val, list):
+                        summary = "list"
+                    elif isinstance(val, dict):
+                        summary = "dict"
+                    else:
+                        summary = type(val).__name__
+                    entry["value_types"].setdefault(key, set()).add(summary)
 
     # Normalise sets to sorted lists for JSON output
     dynamic_serialised = {
@@ -216,17 +373,26 @@ def _summarise_configs(configs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("path", type=Path, help="HAR file or HTML containing the bootstrap payload")
+    parser.add_argument("--routes", action="store_true", help="List route keys of each streamed response in a HAR")
     args = parser.parse_args()
 
+    if args.routes:
+        if args.path.suffix.lower() != ".har":
+            raise SystemExit("--routes requires a HAR file.")
+        json.dump(_process_har_routes(args.path), fp=sys.stdout, indent=2)
+        print()
+        return
+
     if args.path.suffix.lower() == ".har":
-        configs = _process_har(args.path)
+        config_sets = _process_har(args.path)
     else:
         configs = _process_text(args.path.read_text(encoding="utf-8", errors="ignore"))
+        config_sets = [configs] if configs else []
 
-    if not configs:
+    if not config_sets:
         raise SystemExit("No Statsig payload found in the provided file.")
 
-    summary = _summarise_configs(configs)
+    summary = _summarise_configs(config_sets)
     json.dump(summary, fp=sys.stdout, indent=2)
     print()
 